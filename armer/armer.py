@@ -21,7 +21,7 @@ from roboticstoolbox.backends.swift import Swift
 
 from spatialmath.base.argcheck import getvector
 
-from armer.utils import populate_transform_stamped
+from armer.utils import populate_transform_stamped, YAML_LOADER
 from armer.models import URDFRobot
 from armer.robots import ROSRobot
 from armer.timer import Timer
@@ -164,7 +164,7 @@ class Armer:
         :rtype: Armer
         """
         with open(path, 'r') as handle:
-            config = yaml.load(handle, Loader=yaml.SafeLoader)
+            config = yaml.load(handle, Loader=YAML_LOADER)
 
         robots: List[rtb.robot.Robot] = []
 
@@ -0,0 +1,319 @@
+"""
+Kinematics helpers used by Armer
+
+.. codeauthor:: Gavin Suddrey
+.. codeauthor:: Dasun Gunasinghe
+"""
+
+from typing import Callable, Dict, List, Tuple
+from math import atan2, cos, pi, sin, sqrt
+
+import numpy as np
+import roboticstoolbox as rtb
+
+# Column of the accumulated transform that an elementary transform acts along
+_AXIS_COLUMN = {'x': 0, 'y': 1, 'z': 2}
+
+# A traced scalar is a linear combination of generated variables, keyed by
+# variable name ('' being the constant term)
+Term = Dict[str, float]
+
+
+def _kind(et: rtb.ET) -> str:
+    """
+    Returns the transform type and axis of an elementary transform (e.g. 'Rz'),
+    using ET.kind where available (ET.axis is deprecated from rtb 1.4)
+    """
+    return et.kind if hasattr(type(et), 'kind') else et.axis
+
+
+def _snap(value: float, tol: float = 1e-12) -> float:
+    """
+    Snaps numerical noise in constant transforms (e.g. cos(pi/2)) to 0 or +-1
+    so that the corresponding terms can be folded away when tracing
+    """
+    for target in (0.0, 1.0, -1.0):
+        if abs(value - target) < tol:
+            return target
+    return float(value)
+
+
+def _combine(*pairs: Tuple[Term, float]) -> Term:
+    result: Term = {}
+    for term, scale in pairs:
+        for name, coeff in term.items():
+            result[name] = result.get(name, 0.0) + coeff * scale
+    return {name: coeff for name, coeff in result.items() if coeff != 0.0}
+
+
+def _expr(term: Term) -> str:
+    parts = []
+    for name, coeff in term.items():
+        if not name:
+            parts.append(repr(coeff))
+        elif coeff == 1.0:
+            parts.append(name)
+        elif coeff == -1.0:
+            parts.append('-' + name)
+        else:
+            parts.append('{!r} * {}'.format(coeff, name))
+    return ' + '.join(parts) if parts else '0.0'
+
+
+def _product(left: Term, right: Term) -> str:
+    if not left or not right:
+        return ''
+    return '({}) * ({})'.format(_expr(left), _expr(right))
+
+
+def trace_chain(ets: rtb.ETS) -> Tuple[Callable, Callable, Callable]:
+    """
+    Traces a serial ETS into straight-line forward kinematics and
+    base-frame jacobian functions.
+
+    The chain is unrolled symbolically once: constant transforms are folded
+    into the running transform (dropping the zero and unit terms typical of
+    URDF joint origins) and each joint becomes a handful of scalar updates,
+    so the generated functions perform no link lookups, joint type checks
+    or small-matrix products when called. The fused variant shares the
+    link transforms between the pose and the jacobian in a single pass.
+
+    :param ets: The elementary transform sequence to trace (e.g. robot.ets(start, end))
+    :type ets: rtb.ETS
+    :return: fk_chain(q) -> 4x4 ndarray, jacob0_chain(q) -> 6xn ndarray and
+        fk_and_jacob0_chain(q) -> (4x4 ndarray, 6xn ndarray)
+    :rtype: Tuple[Callable, Callable, Callable]
+    """
+    lines: List[str] = []
+    columns: List[Tuple[str, float, List[Term], List[Term]]] = []
+
+    def bind(term: Term) -> Term:
+        # Keep constants and plain (signed) variables inline, name everything else
+        if len(term) <= 1 and all(not name or abs(coeff) == 1.0 for name, coeff in term.items()):
+            return term
+        return bind_expr(_expr(term))
+
+    def bind_expr(expr: str) -> Term:
+        if not expr:
+            return {}
+        name = 't{}'.format(len(lines))
+        lines.append('{} = {}'.format(name, expr))
+        return {name: 1.0}
+
+    # Rows of the running 3x4 transform (the bottom row is implicit)
+    T: List[List[Term]] = [[{'': 1.0} if i == j else {} for j in range(4)] for i in range(3)]
+
+    for et in ets:
+        if not et.isjoint:
+            C = [[_snap(value) for value in row] for row in et.A()]
+            T = [[
+                bind(_combine(
+                    *[(row[k], C[k][j]) for k in range(3)],
+                    *([(row[3], 1.0)] if j == 3 else [])
+                )) for j in range(4)
+            ] for row in T]
+            continue
+
+        index = len(columns)
+        sign = '-' if et.isflip else ''
+        kind = _kind(et)
+        axis = _AXIS_COLUMN[kind[1]]
+
+        if kind[0] == 'R':
+            # Rotating about one axis mixes the remaining two columns
+            a, b = (axis + 1) % 3, (axis + 2) % 3
+            lines.append('c{0} = cos(q[{1}]); s{0} = {2}sin(q[{1}])'.format(index, et.jindex, sign))
+
+            for row in T:
+                c, s = {'c{}'.format(index): 1.0}, {'s{}'.format(index): 1.0}
+                row[a], row[b] = (
+                    bind_expr(' + '.join(filter(None, [_product(c, row[a]), _product(s, row[b])]))),
+                    bind_expr(' - '.join(filter(None, [_product(c, row[b]), _product(s, row[a])]))
+                              if row[b] else '-' + _product(s, row[a]) if row[a] else '')
+                )
+        else:
+            lines.append('d{0} = {1}q[{2}]'.format(index, sign, et.jindex))
+
+            for row in T:
+                row[3] = bind_expr(' + '.join(filter(None, [
+                    _expr(row[3]) if row[3] else '', _product({'d{}'.format(index): 1.0}, row[axis])
+                ])))
+
+        columns.append((
+            kind[0],
+            -1.0 if et.isflip else 1.0,
+            [row[axis] for row in T],
+            [row[3] for row in T]
+        ))
+
+    fk_array = 'array([{}, [0.0, 0.0, 0.0, 1.0]])'.format(
+        ', '.join('[{}]'.format(', '.join(_expr(term) for term in row)) for row in T)
+    )
+    fk_lines = lines + ['return ' + fk_array]
+
+    # Revolute columns are [z x (p_ee - p); z], prismatic columns are [z; 0]
+    jacob_rows: List[List[str]] = [[] for _ in range(6)]
+    for kind, direction, z, p in columns:
+        if kind == 'R':
+            d = [bind(_combine((T[i][3], 1.0), (p[i], -1.0))) for i in range(3)]
+            for i in range(3):
+                j, k = (i + 1) % 3, (i + 2) % 3
+                plus, minus = _product(z[j], d[k]), _product(z[k], d[j])
+                expr = ' - '.join(filter(None, [plus, minus])) if plus \
+                    else '-' + minus if minus else ''
+                jacob_rows[i].append(
+                    '{}({})'.format('-' if direction < 0 else '', expr) if expr else '0.0'
+                )
+                jacob_rows[i + 3].append(_expr(_combine((z[i], direction))))
+        else:
+            for i in range(3):
+                jacob_rows[i].append(_expr(_combine((z[i], direction))))
+                jacob_rows[i + 3].append('0.0')
+
+    jacob_array = 'array([{}])'.format(
+        ', '.join('[{}]'.format(', '.join(row)) for row in jacob_rows)
+    )
+    jacob_lines = lines + ['return ' + jacob_array]
+    fused_lines = lines + ['return {}, {}'.format(fk_array, jacob_array)]
+
+    source = 'def fk_chain(q):\n    {}\n\n'.format('\n    '.join(fk_lines)) + \
+        'def jacob0_chain(q):\n    {}\n\n'.format('\n    '.join(jacob_lines)) + \
+        'def fk_and_jacob0_chain(q):\n    {}\n'.format('\n    '.join(fused_lines))
+
+    namespace = dict(cos=cos, sin=sin, array=np.array)
+    exec(compile(source, '<armer.kinematics>', 'exec'), namespace)  # pylint: disable=exec-used
+
+    return namespace['fk_chain'], namespace['jacob0_chain'], namespace['fk_and_jacob0_chain']
+
+
+def mat_to_quat(R: np.ndarray) -> Tuple[float, float, float, float]:
+    """
+    Converts a rotation matrix to a unit quaternion using Shepperd's method,
+    branching on the largest diagonal term for numerical stability
+
+    :param R: The rotation matrix (or a homogeneous transform)
+    :type R: np.ndarray
+    :return: The quaternion as (w, x, y, z) with w >= 0
+    :rtype: Tuple[float, float, float, float]
+    """
+    (r00, r01, r02), (r10, r11, r12), (r20, r21, r22) = R[:3, :3].tolist()
+
+    trace = r00 + r11 + r22
+
+    if trace > 0.0:
+        s = 2.0 * sqrt(1.0 + trace)
+        w, x, y, z = 0.25 * s, (r21 - r12) / s, (r02 - r20) / s, (r10 - r01) / s
+    elif r00 > r11 and r00 > r22:
+        s = 2.0 * sqrt(1.0 + r00 - r11 - r22)
+        w, x, y, z = (r21 - r12) / s, 0.25 * s, (r01 + r10) / s, (r02 + r20) / s
+    elif r11 > r22:
+        s = 2.0 * sqrt(1.0 + r11 - r00 - r22)
+        w, x, y, z = (r02 - r20) / s, (r01 + r10) / s, 0.25 * s, (r12 + r21) / s
+    else:
+        s = 2.0 * sqrt(1.0 + r22 - r00 - r11)
+        w, x, y, z = (r10 - r01) / s, (r02 + r20) / s, (r12 + r21) / s, 0.25 * s
+
+    if w < 0.0:
+        return -w, -x, -y, -z
+
+    return w, x, y, z
+
+
+def quat_to_transform(x: float, y: float, z: float,
+                      qw: float, qx: float, qy: float, qz: float) -> np.ndarray:
+    """
+    Builds a homogeneous transform from a position and a (normalised on the fly)
+    quaternion without constructing intermediate spatialmath objects
+
+    :param x, y, z: The translation
+    :type x, y, z: float
+    :param qw, qx, qy, qz: The rotation as a quaternion
+    :type qw, qx, qy, qz: float
+    :return: The 4x4 homogeneous transform
+    :rtype: np.ndarray
+    """
+    s = 2.0 / (qw * qw + qx * qx + qy * qy + qz * qz)
+
+    xx, yy, zz = s * qx * qx, s * qy * qy, s * qz * qz
+    xy, xz, yz = s * qx * qy, s * qx * qz, s * qy * qz
+    wx, wy, wz = s * qw * qx, s * qw * qy, s * qw * qz
+
+    return np.array([
+        [1.0 - yy - zz, xy - wz, xz + wy, x],
+        [xy + wz, 1.0 - xx - zz, yz - wx, y],
+        [xz - wy, yz + wx, 1.0 - xx - yy, z],
+        [0.0, 0.0, 0.0, 1.0]
+    ])
+
+
+def _wrap(angle: float) -> float:
+    return (angle + pi) % (2 * pi) - pi
+
+
+def _rpy(R: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Converts a rotation matrix to (roll, pitch, yaw) angles in the ZYX order
+    used by spatialmath (tr2rpy), including its choice of angles at the
+    pitch = +-pi/2 singularity
+    """
+    (r00, r01, r02), (r10, _, _), (r20, r21, r22) = R.tolist()
+
+    if abs(abs(r20) - 1.0) < 20 * np.finfo(np.float64).eps:
+        yaw = -atan2(r01, r02) if r20 < 0 else atan2(-r01, -r02)
+        return 0.0, -pi / 2 if r20 > 0 else pi / 2, yaw
+
+    return atan2(r21, r22), atan2(-r20, sqrt(r00 * r00 + r10 * r10)), atan2(r10, r00)
+
+
+def servo_error(expected: np.ndarray, actual: np.ndarray,
+                e_v: np.ndarray, dt: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Advances the expected end-effector pose by a base frame twist and computes
+    the error of the actual pose relative to it.
+
+    Equivalent to composing spatialmath's rpy2r, trnorm and tr2rpy, but
+    written out over scalars as these run on every cartesian control tick.
+
+    :param expected: The expected end-effector pose as a 4x4 homogeneous transform
+    :type expected: np.ndarray
+    :param actual: The actual end-effector pose as a 4x4 homogeneous transform
+    :type actual: np.ndarray
+    :param e_v: The commanded twist (vx, vy, vz, wx, wy, wz) in the base frame
+    :type e_v: np.ndarray
+    :param dt: The time step to integrate over
+    :type dt: float
+    :return: The new expected pose and the 6 element (position, rpy) error
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    vx, vy, vz, roll, pitch, yaw = (e_v * dt).tolist()
+
+    # Incremental rotation (ZYX roll-pitch-yaw) applied in the base frame
+    cr, sr, cp, sp, cy, sy = cos(roll), sin(roll), cos(pitch), sin(pitch), cos(yaw), sin(yaw)
+    M = np.array([
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+        [-sp, cp * sr, cp * cr]
+    ]) @ expected[:3, :3]
+
+    # Re-orthonormalise, keeping the direction of the approach (z) axis
+    (_, o0, a0), (_, o1, a1), (_, o2, a2) = M.tolist()
+    n0, n1, n2 = o1 * a2 - o2 * a1, o2 * a0 - o0 * a2, o0 * a1 - o1 * a0
+    o0, o1, o2 = a1 * n2 - a2 * n1, a2 * n0 - a0 * n2, a0 * n1 - a1 * n0
+
+    ln, lo, la = sqrt(n0 * n0 + n1 * n1 + n2 * n2), sqrt(o0 * o0 + o1 * o1 + o2 * o2), \
+        sqrt(a0 * a0 + a1 * a1 + a2 * a2)
+
+    (_, _, _, px), (_, _, _, py), (_, _, _, pz) = expected[:3].tolist()
+    px, py, pz = px + vx, py + vy, pz + vz
+
+    T = np.array([
+        [n0 / ln, o0 / lo, a0 / la, px],
+        [n1 / ln, o1 / lo, a1 / la, py],
+        [n2 / ln, o2 / lo, a2 / la, pz],
+        [0.0, 0.0, 0.0, 1.0]
+    ])
+
+    (_, _, _, tx), (_, _, _, ty), (_, _, _, tz) = actual[:3].tolist()
+    e_roll, e_pitch, e_yaw = _rpy(T[:3, :3] @ actual[:3, :3].T)
+
+    return T, np.array([px - tx, py - ty, pz - tz, _wrap(e_roll), _wrap(e_pitch), _wrap(e_yaw)])
@@ -7,25 +7,25 @@ ROSRobot module defines the ROSRobot type
 import os
 import timeit
 
-from typing import List, Any
+from typing import List, Any, Dict
 from threading import Lock, Event
 from armer.timer import Timer
 from armer.trajectory import TrajectoryExecutor
 import rospy
 import actionlib
-import tf
 import roboticstoolbox as rtb
-import spatialmath as sp
-from spatialmath import SE3, SO3, UnitQuaternion, base
+from spatialmath import SE3, base
 import numpy as np
+from scipy.linalg.lapack import dposv
 import yaml
 # Required for NEO
 import qpsolvers as qp
 import spatialgeometry as sg
 
-from armer.utils import ikine, mjtg
+from armer.utils import ikine, mjtg, read_pose_table, write_pose_table, YAML_LOADER, YAML_DUMPER
+from armer.kinematics import trace_chain, mat_to_quat, quat_to_transform, servo_error
 
-from std_msgs.msg import Header, Bool
+from std_msgs.msg import Bool
 from sensor_msgs.msg import JointState
 from geometry_msgs.msg import PoseStamped
 
@@ -76,6 +76,7 @@ from armer_msgs.srv import RemoveNamedPoseConfig, \
 # pylint: disable=too-many-instance-attributes
 
 import tf2_ros
+import tf2_geometry_msgs # pylint: disable=unused-import
 
 class ControlMode:
    JOINTS=1
@@ -120,15 +121,31 @@ class ROSRobot(rtb.Robot):
           self.gripper = self.grippers[0].name if len(self.grippers) > 0 else 'tool0'
           
         sorted_links=[]
-        #sort links by parents starting from gripper
+        joint_names=[]
+        #sort links by parents starting from gripper, collecting joint names in the same pass
         link=self.link_dict[self.gripper]   
         while link is not None:
             sorted_links.append(link)
+            if link.isjoint:
+                joint_names.append(link._joint_name)
             link=link.parent
         sorted_links.reverse()
+        joint_names.reverse()
 
-        self.joint_indexes = []
-        self.joint_names = list(map(lambda link: link._joint_name, filter(lambda link: link.isjoint, sorted_links)))
+        # Indexes of this robot's joints within incoming joint state messages
+        self._joint_index_arr: np.ndarray = None
+        self.joint_names = joint_names
+
+        # Straight-line kinematics from the base link to the gripper
+        self._fk_chain, self._jacob0_chain, self._fk_and_jacob0 = trace_chain(
+            self.ets(start=self.base_link, end=self.gripper)
+        )
+
+        # End-effector pose and jacobian cached for the configuration they were
+        # computed at (see kinematics), as q may also be updated in place by a backend
+        self._q_cache_key: np.ndarray = None
+        self._wTe_cache: np.ndarray = None
+        self._J_cache: np.ndarray = None
         
         if origin:
             self.base = SE3(origin[:3]) @ SE3.RPY(origin[3:])
@@ -136,15 +153,30 @@ class ROSRobot(rtb.Robot):
         self.frequency = frequency if frequency else rospy.get_param((
           joint_state_topic if joint_state_topic else '/joint_states') + '/frequency', 500
         )
+
+        # Enables additional (debug only) logging such as trajectory cartesian speeds
+        self._debug: bool = rospy.get_param('~debug', False)
         
         self.q = self.qr if hasattr(self, 'qr') else self.q # pylint: disable=no-member
         if modified_qr:
             self.qr = modified_qr
             self.q = modified_qr
 
+        # Double buffer filled by _state_cb; the control loop copies the latest
+        # complete sample (selected by the sequence number) into q on each step
+        self._q_buffers: np.ndarray = np.tile(np.asarray(self.q, dtype=np.float64), (2, 1))
+        self._q_seq: int = 0
+        self._q_read_seq: int = 0
+
         # Joint state message
         self.joint_states = None
 
+        # Joint positions, velocities and efforts in robot joint order (one row each),
+        # latched by step alongside q and sliced directly into the published state
+        self._js_soa: np.ndarray = np.zeros((3, self.n))
+        # Double buffer filled by _state_cb, selected by the same sequence number as q
+        self._js_buffers: np.ndarray = np.zeros((2, 3, self.n))
+
         # Guards used to prevent multiple motion requests conflicting
         self._controller_mode = ControlMode.JOINTS
 
@@ -159,17 +191,41 @@ class ROSRobot(rtb.Robot):
         # Arm state property
         self.state: ManipulatorState = ManipulatorState()
 
+        # State message reused by get_state (pose and velocity share one header)
+        self._state_msg: ManipulatorState = ManipulatorState()
+        self._state_msg.ee_pose.header.frame_id = self.base_link.name
+        self._state_msg.ee_velocity.header = self._state_msg.ee_pose.header
+
+        # Guards of the active guarded motion, packed once per goal
+        self._active_guard_enabled: int = 0
+        self._active_guard_duration: float = 0
+        self._active_guard_threshold: np.ndarray = np.zeros(6)
+
+        # End-effector wrench packed as [force, torque] while effort guards are active
+        self._wrench_vec: np.ndarray = np.zeros(6)
+
         # Expected cartesian velocity
         self.e_v_frame: str = None 
 
-        # cartesian motion
-        self.e_v: np.array = np.zeros(shape=(6,)) 
-        # expected joint velocity
+        # cartesian motion (updated in place)
+        self.e_v: np.array = np.zeros(shape=(6,), dtype=np.float64)
+        # expected joint velocity (updated in place)
         self.j_v: np.array = np.zeros(
-            shape=(len(self.q),)
+            shape=(len(self.q),), dtype=np.float64
         ) 
-
-        self.e_p = self.fkine(self.q, start=self.base_link, end=self.gripper)
+        # byte views of the commands, all zero exactly when a command is (+0.0) zero
+        self._ev_bytes: np.ndarray = self.e_v.view(np.uint8)
+        self._jv_bytes: np.ndarray = self.j_v.view(np.uint8)
+        # base frame cartesian velocity and damped normal equation scratch used by step
+        # (kept in float64: at 6x6 a float32 solve is no faster once the traced
+        # kinematics output is cast, and the 1e-6 damping is close to float32 epsilon)
+        self._ev_buf: np.ndarray = np.zeros(6)
+        self._JJt: np.ndarray = np.zeros((6, 6))
+        self._Jt: np.ndarray = np.zeros((self.n, 6))
+
+        self.e_p = self._fk_ee(self.q)
+        # Set when the expected pose should be re-anchored on the actual pose by step
+        self._e_p_dirty: bool = False
 
         # self.Kp: float = Kp if Kp else 0.0
         # self.Ki: float = Ki if Ki else 0.0
@@ -194,7 +250,8 @@ class ROSRobot(rtb.Robot):
 
         if not self.readonly:
             # Create Transform Listener
-            self.tf_listener = tf.TransformListener()
+            self.tf_buffer = tf2_ros.Buffer()
+            self.tf_listener = tf2_ros.TransformListener(self.tf_buffer)
 
             # --- Setup Configuration for ARMer --- #
             self.config_path = config_path if config_path else os.path.join(
@@ -202,7 +259,13 @@ class ROSRobot(rtb.Robot):
                 '.ros/configs/armer.yaml'
             )
             self.custom_configs: List[str] = []
-            self.__load_config()
+
+            # Named poses are loaded on first access (see named_poses), with the
+            # poses of each file cached against its modification time
+            self._loaded: bool = False
+            self._named_poses: Dict[str, List[float]] = {}
+            self._config_mtimes: Dict[str, int] = {}
+            self._config_poses: Dict[str, Dict[str, List[float]]] = {}
 
             # --- ROS Publisher Setup --- #
             self.joint_publisher: rospy.Publisher = rospy.Publisher(
@@ -210,6 +273,8 @@ class ROSRobot(rtb.Robot):
                 Float64MultiArray,
                 queue_size=1
             )
+            # Joint velocity command message reused by publish
+            self._qd_msg = Float64MultiArray()
             self.state_publisher: rospy.Publisher = rospy.Publisher(
                 '{}/state'.format(self.name.lower()), 
                 ManipulatorState, 
@@ -366,11 +431,29 @@ class ROSRobot(rtb.Robot):
     # --------- ROS Topic Callback Methods -------------------------------- #
     # --------------------------------------------------------------------- #
     def _state_cb(self, msg):
-        if not self.joint_indexes:
-            for joint_name in self.joint_names:
-                self.joint_indexes.append(msg.name.index(joint_name))
+        if self._joint_index_arr is None:
+            self._joint_index_arr = np.fromiter(
+                (msg.name.index(joint_name) for joint_name in self.joint_names),
+                dtype=np.intp,
+                count=len(self.joint_names)
+            )
         
-        self.q = np.array(msg.position)[self.joint_indexes] if len(msg.position) == self.n else np.zeros(self.n)
+        back = self._q_buffers[(self._q_seq + 1) & 1]
+
+        if len(msg.position) == self.n:
+            np.take(np.asarray(msg.position, dtype=np.float64), self._joint_index_arr, out=back)
+        else:
+            back.fill(0)
+
+        back_js = self._js_buffers[(self._q_seq + 1) & 1]
+
+        for row, values in zip(back_js, (msg.position, msg.velocity, msg.effort)):
+            if len(values) == len(msg.name):
+                np.take(np.asarray(values, dtype=np.float64), self._joint_index_arr, out=row)
+            else:
+                row.fill(0)
+
+        self._q_seq += 1
         self.joint_states = msg
         
     def velocity_cb(self, msg: TwistStamped) -> None:
@@ -401,7 +484,7 @@ class ROSRobot(rtb.Robot):
             self.preempt()
 
         with self.lock:
-            self.j_v = np.array(msg.joints)
+            np.copyto(self.j_v, msg.joints)
             self.last_update = rospy.get_time()
 
     # --------------------------------------------------------------------- #
@@ -423,15 +506,35 @@ class ROSRobot(rtb.Robot):
             
             start_time = rospy.get_time()
             triggered = 0
+
+            effort = msg.guards.effort
+            self._wrench_vec.fill(0)
+            self._active_guard_threshold = np.array([
+                effort.force.x,
+                effort.force.y,
+                effort.force.z,
+                effort.torque.x,
+                effort.torque.y,
+                effort.torque.z,
+            ])
+            self._active_guard_duration = msg.guards.duration
+            self._active_guard_enabled = msg.guards.enabled
             
             while not self.preempted:
-                triggered = self.test_guards(msg.guards, start_time=start_time)
+                triggered = self.test_guards(start_time=start_time)
 
                 if triggered != 0:
                     break
 
                 self.__vel_move(msg.twist_stamped)
-                rospy.sleep(0.01)
+
+                # Re-test the guards once the next control step has packed the state
+                # (step is paced by the driver's rate, so this follows sim time; the
+                # timeout only guards against a stalled control loop)
+                self.event.clear()
+                self.event.wait(0.1)
+
+            self._active_guard_enabled = 0
 
             if not self.preempted:
                 self.velocity_server.set_succeeded(GuardedVelocityResult(triggered=triggered))
@@ -462,26 +565,23 @@ class ROSRobot(rtb.Robot):
             self.moving = True
             self.preempted = False
 
-            # Current end-effector pose
-            Te = self.ets(start=self.base_link, end=self.gripper).eval(self.q)
+            # Current end-effector pose and base frame jacobian
+            Te, J0 = self._fk_and_jacob0(self.q)
 
             # Handle frame id of servo request
             if msg.header.frame_id == '':
                 msg.header.frame_id = self.base_link.name
             
-            goal_pose_stamped = self.tf_listener.transformPose(
-                self.base_link.name,
+            goal_pose_stamped = self._transform_pose(
                 PoseStamped(header=msg.header, pose=goal_pose)
             )
             pose = goal_pose_stamped.pose
 
-            # Convert target to SE3 (from pose)
-            target = SE3(pose.position.x, pose.position.y, pose.position.z) * UnitQuaternion([
-                pose.orientation.w,
-                pose.orientation.x,
-                pose.orientation.y,
-                pose.orientation.z
-            ]).SE3()
+            # Convert target to a homogeneous transform (from pose)
+            target = quat_to_transform(
+                pose.position.x, pose.position.y, pose.position.z,
+                pose.orientation.w, pose.orientation.x, pose.orientation.y, pose.orientation.z
+            )
 
             # Calculate the required end-effector spatial velocity for the robot
             # to approach the goal.
@@ -493,13 +593,17 @@ class ROSRobot(rtb.Robot):
             )
 
             ##### TESTING NEO IMPLEMENTATION #####
-            # neo_jv = self.neo(Tep=target, velocities=velocities)
+            # neo_jv = self.neo(Tep=SE3(target, check=False), velocities=velocities)
             neo_jv = None
 
             if np.any(neo_jv):
-                self.j_v = neo_jv[:len(self.q)]
+                np.copyto(self.j_v, neo_jv[:len(self.q)])
             else:
-                self.j_v = np.linalg.pinv(self.jacobe(self.q)) @ velocities
+                # End-effector frame jacobian from the base frame jacobian
+                Je = np.concatenate((Te[:3, :3].T @ J0[:3], Te[:3, :3].T @ J0[3:]), axis=0)
+
+                # Damped least-squares (minimum norm) solution rather than an SVD based pseudo-inverse
+                np.copyto(self.j_v, Je.T @ np.linalg.solve(Je @ Je.T + 1e-6 * np.eye(6), velocities))
 
             # print(f"current jv: {self.j_v} | updated neo jv: {neo_jv}")
             self.last_update = rospy.get_time()
@@ -524,10 +628,7 @@ class ROSRobot(rtb.Robot):
             if goal_pose.header.frame_id == '':
                 goal_pose.header.frame_id = self.base_link.name
 
-            goal_pose = self.tf_listener.transformPose(
-                self.base_link.name,
-                goal_pose,
-            )
+            goal_pose = self._transform_pose(goal_pose)
             
             pose = goal_pose.pose
             
@@ -701,6 +802,12 @@ class ROSRobot(rtb.Robot):
                 rospy.loginfo(f"LINK -> {link.name} | POSE: {link._Ts}")
                 link._Ts = test_offset.A
                 rospy.loginfo(f"UPDATED LINK -> {link.name} | POSE: {link._Ts}")
+
+        # Re-trace the kinematics as link transforms are folded in as constants
+        self._fk_chain, self._jacob0_chain, self._fk_and_jacob0 = trace_chain(
+            self.ets(start=self.base_link, end=self.gripper)
+        )
+        self._wTe_cache = None
         return EmptyResponse()
 
     def set_cartesian_impedance_cb(  # pylint: disable=no-self-use
@@ -782,7 +889,7 @@ class ROSRobot(rtb.Robot):
         :rtype: AddNamedPoseConfigResponse
         """
         self.custom_configs.append(request.config_path)
-        self.__load_config()
+        self._loaded = False
         return True
 
     def remove_named_pose_config_cb(
@@ -797,7 +904,7 @@ class ROSRobot(rtb.Robot):
         """
         if request.config_path in self.custom_configs:
             self.custom_configs.remove(request.config_path)
-            self.__load_config()
+            self._loaded = False
         return True
 
     def get_named_pose_configs_cb(
@@ -912,7 +1019,7 @@ class ROSRobot(rtb.Robot):
 
         return qd
 
-    def check_singularity(self, q=None) -> bool:
+    def check_singularity(self, q=None, J=None) -> bool:
         """
         Checks the manipulability as a scalar manipulability index
         for the robot at the joint configuration to indicate singularity approach. 
@@ -923,11 +1030,13 @@ class ROSRobot(rtb.Robot):
 
         :param q: The robot state to check for manipulability.
         :type q: numpy array of joints (float)
+        :param J: A jacobian already computed at q (skips recomputing it), defaults to None
+        :type J: numpy array (6xn), optional
         :return: True (if within singularity) or False (otherwise)
         :rtype: bool
         """
         # Get the robot state manipulability
-        self.manip_scalar = self.manipulability(q)
+        self.manip_scalar = self.manipulability(q, J=J)
 
         # Debugging
         # rospy.loginfo(f"Manipulability: {manip_scalar} | --> 0 is singularity")
@@ -979,15 +1088,72 @@ class ROSRobot(rtb.Robot):
             target.angular.z
         ])
         
-        if np.any(e_v - self.e_v) or self._controller_mode == ControlMode.JOINTS:
-            self.e_p = self.fkine(self.q, start=self.base_link, end=self.gripper)
+        if self._controller_mode == ControlMode.JOINTS or not np.array_equal(e_v, self.e_v):
+            self._e_p_dirty = True
 
-        self.e_v = e_v
+        np.copyto(self.e_v, e_v)
         self.e_v_frame = twist_stamped.header.frame_id
 
         self._controller_mode = ControlMode.CARTESIAN
         self.last_update = rospy.get_time()
 
+    def _transform_pose(self, pose_stamped: PoseStamped) -> PoseStamped:
+        """
+        Transforms a stamped pose into the base link frame of the robot
+
+        :param pose_stamped: The pose to transform
+        :type pose_stamped: PoseStamped
+        :return: The pose w.r.t. the base link
+        :rtype: PoseStamped
+        """
+        if pose_stamped.header.frame_id == self.base_link.name:
+            return pose_stamped
+
+        return self.tf_buffer.transform(
+            pose_stamped,
+            self.base_link.name,
+            timeout=rospy.Duration(0.05)
+        )
+
+    def _fk_ee(self, q: np.ndarray) -> np.ndarray:
+        """
+        Computes the end-effector pose (including the robot base transform)
+        using the traced kinematics, equivalent to
+        fkine(q, start=self.base_link, end=self.gripper).A
+
+        :param q: The joint configuration
+        :type q: np.ndarray
+        :return: The end-effector pose as a 4x4 homogeneous transform
+        :rtype: np.ndarray
+        """
+        return self.base.A @ self._fk_chain(q)
+
+    @property
+    def debug(self) -> bool:
+        """
+        Whether the driver was started in debug mode (~debug)
+
+        :return: True if debug logging is enabled
+        :rtype: bool
+        """
+        return self._debug
+
+    def kinematics(self):
+        """
+        Returns the end-effector pose (relative to the base link) and the base
+        frame jacobian at the current joint configuration. These are only
+        recomputed when the contents of q change, so are shared by the state
+        message and the cartesian controller within a control tick
+
+        :return: The 4x4 end-effector pose and the 6xn jacobian
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        if self._wTe_cache is None or not np.array_equal(self._q_cache_key, self.q):
+            self._wTe_cache, self._J_cache = self._fk_and_jacob0(self.q)
+            self._q_cache_key = np.array(self.q)
+
+        return self._wTe_cache, self._J_cache
+
     def get_state(self) -> ManipulatorState:
         """
         Generates a ManipulatorState message for the robot
@@ -995,95 +1161,77 @@ class ROSRobot(rtb.Robot):
         :return: ManipulatorState message describing the current state of the robot
         :rtype: ManipulatorState
         """
-        jacob0 = self.jacob0(self.q, end=self.gripper)
-        
-        ## end-effector position
-        ee_pose = self.ets(start=self.base_link, end=self.gripper).eval(self.q)
-        header = Header()
-        header.frame_id = self.base_link.name
-        header.stamp = rospy.Time.now()
-
-        pose_stamped = PoseStamped()
-        pose_stamped.header = header
-
-        translation = ee_pose[:3, 3]    
-        pose_stamped.pose.position.x = translation[0]
-        pose_stamped.pose.position.y = translation[1]
-        pose_stamped.pose.position.z = translation[2]
+        ## end-effector position and jacobian (cached per joint state)
+        ee_pose, jacob0 = self.kinematics()
 
-        rotation = ee_pose[:3, :3]
-        ee_rot = sp.UnitQuaternion(rotation)
+        # The message is preallocated, only its fields are updated
+        state = self._state_msg
+        state.ee_pose.header.stamp = rospy.Time.now()
 
-        pose_stamped.pose.orientation.w = ee_rot.A[0]
-        pose_stamped.pose.orientation.x = ee_rot.A[1]
-        pose_stamped.pose.orientation.y = ee_rot.A[2]
-        pose_stamped.pose.orientation.z = ee_rot.A[3]
+        position = state.ee_pose.pose.position
+        position.x, position.y, position.z = ee_pose[:3, 3].tolist()
 
-        state = ManipulatorState()
-        state.ee_pose = pose_stamped
+        orientation = state.ee_pose.pose.orientation
+        orientation.w, orientation.x, orientation.y, orientation.z = mat_to_quat(ee_pose)
 
         # end-effector velocity
         T = jacob0 @ self.qd
 
-        twist_stamped = TwistStamped()
-        twist_stamped.header = header
-        twist_stamped.twist.linear.x = T[0]
-        twist_stamped.twist.linear.y = T[1]
-        twist_stamped.twist.linear.z = T[2]
-        twist_stamped.twist.angular.x = T[3]
-        twist_stamped.twist.angular.x = T[4]
-        twist_stamped.twist.angular.x = T[5]
-
-        state.ee_velocity = twist_stamped
-        
-        # joints
-        if self.joint_states:
-            state.joint_poses = np.array(self.joint_states.position)[self.joint_indexes]
-            state.joint_velocities = np.array(self.joint_states.velocity)[self.joint_indexes]
-            state.joint_torques = np.array(self.joint_states.effort)[self.joint_indexes]
+        twist = state.ee_velocity.twist
+        twist.linear.x, twist.linear.y, twist.linear.z, \
+            twist.angular.x, twist.angular.y, twist.angular.z = T.tolist()
         
-        else:
-            state.joint_poses = list(self.q)
-            state.joint_velocities = list(self.qd)
-            state.joint_torques = np.zeros(self.n)
+        # joints (until a joint state is latched, report the configuration and command)
+        if not self._q_read_seq:
+            self._js_soa[0] = self.q
+            self._js_soa[1] = self.qd
+
+        state.joint_poses = self._js_soa[0]
+        state.joint_velocities = self._js_soa[1]
+        state.joint_torques = self._js_soa[2]
         
         return state
 
     def test_guards(
         self,
-        guards: Guards,
         start_time: float) -> int:
+        """
+        Tests the guards of the active guarded motion (packed by guarded_velocity_cb)
 
+        :param start_time: The time at which the guarded motion started
+        :type start_time: float
+        :return: Bitmask of the guards that have been triggered
+        :rtype: int
+        """
         triggered = 0
 
-        if (guards.enabled & guards.GUARD_DURATION) == guards.GUARD_DURATION:
-            triggered |= guards.GUARD_DURATION if rospy.get_time() - start_time > guards.duration else 0
-
-        if (guards.enabled & guards.GUARD_EFFORT) == guards.GUARD_EFFORT:
-            eActual = np.fabs(np.array([
-                self.state.ee_wrench.wrench.force.x,
-                self.state.ee_wrench.wrench.force.y,
-                self.state.ee_wrench.wrench.force.z,
-                self.state.ee_wrench.wrench.torque.x,
-                self.state.ee_wrench.wrench.torque.y,
-                self.state.ee_wrench.wrench.torque.z,
-            ]))
-
-            eThreshold = np.array([
-                guards.effort.force.x,
-                guards.effort.force.y,
-                guards.effort.force.z,
-                guards.effort.torque.x,
-                guards.effort.torque.y,
-                guards.effort.torque.z,
-            ])
+        if self._active_guard_enabled & Guards.GUARD_DURATION:
+            triggered |= Guards.GUARD_DURATION \
+                if rospy.get_time() - start_time > self._active_guard_duration else 0
 
-            triggered |= guards.GUARD_EFFORT if np.any(eActual > eThreshold) else 0
+        if self._active_guard_enabled & Guards.GUARD_EFFORT:
+            # The wrench is packed by step while effort guards are active
+            triggered |= Guards.GUARD_EFFORT \
+                if np.any(np.fabs(self._wrench_vec) > self._active_guard_threshold) else 0
             
         return triggered
 
+    @staticmethod
+    def _decay_factor(command: np.ndarray) -> float:
+        """
+        Returns the factor a stale velocity command is scaled by on each tick:
+        0.9 while the command is above the stopping threshold, otherwise 0
+
+        :param command: The cartesian or joint velocity command
+        :type command: np.ndarray
+        :return: The decay factor
+        :rtype: float
+        """
+        return 0.9 if np.abs(command).sum() >= 0.0001 else 0.0
+
     def publish(self):
-        self.joint_publisher.publish(Float64MultiArray(data=self.qd))
+        self._qd_msg.data = self.qd.tolist()
+        self.joint_publisher.publish(self._qd_msg)
 
     def step(self, dt: float = 0.01) -> None:  # pylint: disable=unused-argument
         """
@@ -1091,100 +1239,171 @@ class ROSRobot(rtb.Robot):
         :param dt: the delta time since the last update, defaults to 0.01
         :type dt: float, optional
         """
+        # Latch the most recent joint state for this control tick
+        if self._q_seq != self._q_read_seq:
+            self._q_read_seq = self._q_seq
+            # Copied into whichever array q currently holds (the q setter rebinds it)
+            np.copyto(self.q, self._q_buffers[self._q_read_seq & 1])
+            np.copyto(self._js_soa, self._js_buffers[self._q_read_seq & 1])
+
         if self.readonly:
             return
 
         current_time = rospy.get_time()
+        elapsed = current_time - self.last_update
         self.state = self.get_state()
 
+        if self._active_guard_enabled & Guards.GUARD_EFFORT:
+            wrench = self.state.ee_wrench.wrench
+            self._wrench_vec[:] = (
+                wrench.force.x,
+                wrench.force.y,
+                wrench.force.z,
+                wrench.torque.x,
+                wrench.torque.y,
+                wrench.torque.z,
+            )
+
         # PREEMPT motion on any detected state errors or singularity approach
-        if self.state.errors != 0 or self.check_singularity(self.q):
+        if self.state.errors != 0 or self.check_singularity(self.q, J=self.kinematics()[1]):
             self.preempt()
 
         # calculate joint velocities from desired cartesian velocity
         if self._controller_mode == ControlMode.CARTESIAN:
-            if current_time - self.last_update > 0.1:
-                self.e_v *= 0.9 if np.sum(np.absolute(self.e_v)
-                                          ) >= 0.0001 else 0
+            if elapsed > 0.1:
+                # The same factor decays the command and tells whether it has stopped
+                factor = self._decay_factor(self.e_v) if self._ev_bytes.any() else 0.0
+                self.e_v *= factor
 
-                if np.all(self.e_v == 0):
+                if not factor:
                     self._controller_mode = ControlMode.JOINTS
 
             try:
-                _, orientation = self.tf_listener.lookupTransform(
+                orientation = self.tf_buffer.lookup_transform(
                     self.base_link.name,
                     self.e_v_frame,
                     rospy.Time(0)
-                )
-                
-                U = UnitQuaternion([
-                    orientation[-1],
-                    *orientation[:3]
-                ], norm=True, check=False).SE3()
-                
-                e_v = np.concatenate((
-                (U.A @ np.concatenate((self.e_v[:3], [1]), axis=0))[:3],
-                (U.A @ np.concatenate((self.e_v[3:], [1]), axis=0))[:3]
-                ), axis=0)
-                
-                # Calculate error in base frame
-                p = self.e_p.A[:3, 3] + e_v[:3] * dt                     # expected position
-                Rq = UnitQuaternion.RPY(e_v[3:] * dt) * UnitQuaternion(self.e_p.R)
+                ).transform.rotation
                 
-                T = SE3.Rt(SO3(Rq.R), p, check=False)   # expected pose
-                Tactual = self.fkine(self.q, start=self.base_link, end=self.gripper) # actual pose
+                U = quat_to_transform(
+                    0.0, 0.0, 0.0,
+                    orientation.w,
+                    orientation.x,
+                    orientation.y,
+                    orientation.z
+                )[:3, :3]
                 
-                e_rot = (SO3(T.R @ np.linalg.pinv(Tactual.R), check=False).rpy() + np.pi) % (2*np.pi) - np.pi
-                error = np.concatenate((p - Tactual.t, e_rot), axis=0)
+                e_v = self._ev_buf
+                np.dot(U, self.e_v[:3], out=e_v[:3])
+                np.dot(U, self.e_v[3:], out=e_v[3:])
                 
-                e_v = e_v + error
+                ee_pose, jacob0 = self.kinematics()
+                Tactual = self.base.A @ ee_pose # actual pose
+
+                # Re-anchor the expected pose on the actual pose after a command change
+                if self._e_p_dirty:
+                    self.e_p = Tactual
+                    self._e_p_dirty = False
+
+                # Calculate expected pose and error in base frame
+                self.e_p, error = servo_error(self.e_p, Tactual, e_v, dt)
                 
-                self.e_p = T
+                e_v += error
                             
-                self.j_v = np.linalg.pinv(
-                self.jacob0(self.q, end=self.gripper)) @ e_v
+                # Damped least squares (minimum norm for redundant arms) in place of an SVD
+                # based pinv, solved by Cholesky as J J^T + lambda I is symmetric positive definite
+                np.copyto(self._Jt, jacob0.T)
+                np.dot(jacob0, self._Jt, out=self._JJt)
+                self._JJt.flat[::7] += 1e-6
+                _, x, info = dposv(self._JJt, e_v, overwrite_a=1)
+
+                if info == 0:
+                    np.dot(self._Jt, x, out=self.j_v)
+                else:
+                    rospy.logwarn_throttle(
+                        1.0, 'Unable to resolve cartesian velocity (dposv info: %d)', info
+                    )
+                    self.j_v.fill(0)
               
-            except (tf.LookupException, tf2_ros.ExtrapolationException):
+            except (tf2_ros.LookupException,
+                    tf2_ros.ConnectivityException,
+                    tf2_ros.ExtrapolationException):
               rospy.logwarn('No valid transform found between %s and %s', self.base_link.name, self.e_v_frame)
               self.preempt()
 
         # apply desired joint velocity to robot
         if self.executor:
-          self.j_v = self.executor.step(dt)  
+          np.copyto(self.j_v, self.executor.step(dt))
         else:
             # Needed for preempting joint velocity control
-            if any(self.j_v) and current_time - self.last_update > 0.1:
-                self.j_v *= 0.9 if np.sum(np.absolute(self.j_v)) >= 0.0001 else 0
+            if elapsed > 0.1 and self._jv_bytes.any():
+                self.j_v *= self._decay_factor(self.j_v)
             
-        self.qd = self.j_v
+        # Copied into whichever array qd currently holds (the qd setter rebinds it)
+        np.copyto(self.qd, self.j_v)
         self.last_tick = current_time
 
         self.state_publisher.publish(self.state)
 
         self.event.set()
 
+    @property
+    def named_poses(self) -> Dict[str, List[float]]:
+        """
+        The named poses available to the arm, loaded from the configs on first
+        access and reloaded after the list of custom configs changes
+
+        :return: The joint configurations keyed by pose name
+        :rtype: Dict[str, List[float]]
+        """
+        if not self._loaded:
+            self.__load_config()
+        return self._named_poses
+
     def __load_config(self):
-        """[summary]
         """
-        self.named_poses = {}
-        for config_name in self.custom_configs:
+        Merges the named poses of the custom configs and the host config
+        (which takes precedence), only parsing files that have been modified
+        since they were last read
+        """
+        named_poses = {}
+        for config_name in self.custom_configs + [self.config_path]:
             try:
-                config = yaml.load(open(config_name))
-                if config and 'named_poses' in config:
-                    self.named_poses.update(config['named_poses'])
-            except IOError:
-                rospy.logwarn(
-                    'Unable to locate configuration file: {}'.format(config_name))
+                mtime = os.stat(config_name).st_mtime_ns
 
-        if os.path.exists(self.config_path):
-            try:
-                config = yaml.load(open(self.config_path),
-                                   Loader=yaml.SafeLoader)
-                if config and 'named_poses' in config:
-                    self.named_poses.update(config['named_poses'])
+                if self._config_mtimes.get(config_name) != mtime:
+                    self._config_poses[config_name] = self.__read_named_poses(config_name)
+                    self._config_mtimes[config_name] = mtime
+
+                named_poses.update(self._config_poses[config_name])
 
             except IOError:
-                pass
+                if config_name != self.config_path:
+                    rospy.logwarn(
+                        'Unable to locate configuration file: {}'.format(config_name))
+
+        self._named_poses = named_poses
+        self._loaded = True
+
+    def __read_named_poses(self, config_name: str) -> Dict[str, List[float]]:
+        """
+        Reads the named poses of a config. For the host config, the pose table
+        written alongside it (see write_pose_table) is used when it is current
+
+        :param config_name: The path to the YAML config
+        :type config_name: str
+        :return: The joint configurations keyed by pose name
+        :rtype: Dict[str, List[float]]
+        """
+        if config_name == self.config_path:
+            named_poses = read_pose_table(config_name)
+            if named_poses is not None:
+                return named_poses
+
+        with open(config_name) as handle:
+            config = yaml.load(handle, Loader=YAML_LOADER)
+
+        return config['named_poses'] if config and 'named_poses' in config else {}
 
     def __write_config(self, key: str, value: Any):
         """[summary]
@@ -1201,7 +1420,7 @@ class ROSRobot(rtb.Robot):
 
         try:
             with open(self.config_path) as handle:
-                current = yaml.load(handle.read(), Loader=yaml.SafeLoader)
+                current = yaml.load(handle, Loader=YAML_LOADER)
 
                 if current:
                     config = current
@@ -1209,7 +1428,17 @@ class ROSRobot(rtb.Robot):
         except IOError:
             pass
 
+        # Nothing to do if the config on disk already holds this value
+        if key in config and config[key] == value:
+            return
+
         config.update({key: value})
 
-        with open(self.config_path, 'w') as handle:
-            handle.write(yaml.dump(config))
+        # Write to a temporary file and swap it in so readers never see a partial config
+        with open(self.config_path + '.tmp', 'w') as handle:
+            yaml.dump(config, handle, Dumper=YAML_DUMPER)
+        os.replace(self.config_path + '.tmp', self.config_path)
+
+        # Written after the YAML config, as the table records its mtime and size
+        if key == 'named_poses':
+            write_pose_table(self.config_path, value)
@@ -5,9 +5,10 @@ Trajectory Executor class used by Armer
 .. codeauthor:: Dasun Gunasinghe
 """
 
+from math import sqrt
+
 import numpy as np
 import rospy
-import scipy
 import roboticstoolbox as rtb
 from roboticstoolbox.tools.trajectory import Trajectory
 
@@ -21,7 +22,9 @@ class TrajectoryExecutor:
 
     self.time_step = 0
     
-    self.cartesian_ee_vel_vect = [] # logging
+    # Cartesian speed logging (only gathered in debug mode)
+    self.debug = self.robot.debug
+    self.cartesian_ee_vel_vect = []
 
     self.is_aborted = False
 
@@ -29,31 +32,31 @@ class TrajectoryExecutor:
     self._success = False
     
 
+    # Trajectory samples are uniformly spaced over normalised time [0, 1]
     if self.traj.istime and len(self.traj.s) >= 2:
-      s = np.linspace(0, 1, len(self.traj.s))
-      self.qfunc = scipy.interpolate.interp1d(s, np.array(self.traj.s), axis=0)
-      self.qdfunc = scipy.interpolate.interp1d(s, np.array(self.traj.sd), axis=0)
+      self.qs = np.ascontiguousarray(self.traj.s)
+      self.qds = np.ascontiguousarray(self.traj.sd)
 
   def step(self, dt: float):
     # Self termination if within goal space
     if self.is_finished(cutoff=0.01):
       return np.zeros(self.robot.n)
 
-    # Compute current state jacobian
-    jacob0 = self.robot.jacob0(self.robot.q, end=self.robot.gripper)
-
-    # Get current joint velocity and calculate current twist
+    # Get current joint velocity
     current_jv = self.robot.state.joint_velocities #elf.j_v
     current_jp = self.robot.state.joint_poses
 
-    current_twist = jacob0 @ current_jv
-    current_linear_vel = np.linalg.norm(current_twist[:3])
-    self.cartesian_ee_vel_vect.append(current_linear_vel)
+    if self.debug:
+      # Compute current state jacobian and twist for logging
+      _, jacob0 = self.robot.kinematics()
+      vx, vy, vz = (jacob0[:3] @ current_jv).tolist()
+      current_linear_vel = sqrt(vx * vx + vy * vy + vz * vz)
+      self.cartesian_ee_vel_vect.append(current_linear_vel)
+      rospy.logdebug_throttle(0.5, f"Current cartesian speed: {current_linear_vel}")
 
     # Calculate required joint velocity at this point in time based on trajectory
     if self.traj.istime:
-      req_jp = self.qfunc(self.time_step / self.traj.t)
-      req_jv = self.qdfunc(self.time_step / self.traj.t)
+      req_jp, req_jv = self.sample(self.time_step / self.traj.t)
     else:
       req_jp = self.traj.s[self.time_step]
       req_jv = self.traj.sd[self.time_step]
@@ -85,6 +88,18 @@ class TrajectoryExecutor:
     # print(f"###")
     return corr_jv
 
+  def sample(self, s: float):
+    # Linearly interpolates the joint positions and velocities at normalised time s
+    # by indexing directly into the uniformly spaced samples
+    x = min(max(s, 0.0), 1.0) * (len(self.qs) - 1)
+    i = min(int(x), len(self.qs) - 2)
+    frac = x - i
+
+    return (
+      self.qs[i] + frac * (self.qs[i + 1] - self.qs[i]),
+      self.qds[i] + frac * (self.qds[i + 1] - self.qds[i])
+    )
+
   def abort(self):
     self._finished = True
     self._success = False
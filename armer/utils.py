@@ -5,17 +5,29 @@ Utility functions used by Armer
 .. codeauthor:: Dasun Gunasinghe
 """
 
+import os
+import zipfile
+from typing import Dict, List, Optional
+
 import rospy
 import numpy as np
-from spatialmath import SE3, SO3, UnitQuaternion, base
+import yaml
+from spatialmath import SE3, SO3
 from geometry_msgs.msg import TransformStamped
+from armer.kinematics import mat_to_quat, quat_to_transform
 import roboticstoolbox as rtb
 from roboticstoolbox.tools.trajectory import Trajectory
-from scipy.interpolate import interp1d
+
+# YAML loader/dumper for configs, using the libyaml bindings when available
+YAML_LOADER = yaml.CSafeLoader if hasattr(yaml, 'CSafeLoader') else yaml.SafeLoader
+YAML_DUMPER = yaml.CSafeDumper if hasattr(yaml, 'CSafeDumper') else yaml.SafeDumper
+
 
 def ikine(robot, target, q0, end):
-    Tep = SE3(target.position.x, target.position.y, target.position.z) * \
-            UnitQuaternion(target.orientation.w, [target.orientation.x, target.orientation.y, target.orientation.z]).SE3()
+    Tep = quat_to_transform(
+        target.position.x, target.position.y, target.position.z,
+        target.orientation.w, target.orientation.x, target.orientation.y, target.orientation.z
+    )
             
     # Using the roboticstoolbox Levemberg-Marquadt (LM) Numerical inverse kinematics solver
     result = robot.ik_LM(
@@ -56,23 +68,17 @@ def mjtg(robot: rtb.Robot, qf: np.ndarray, max_speed: float=0.2, max_rot: float=
     # print(f"linear time: {linear_move_time} | angular time: {angular_move_time} | move_time: {move_time}")
 
     # Obtain minimum jerk velocity profile of joints based on estimated end effector move time
-    qd = []
-    qdd = []
-
     # Calculate time frequency - based on the max time required for trajectory and the frequency of operation
     timefreq = int(move_time * frequency)
-    for time in range(1, timefreq):
-        qd.append(
-            robot.q + (qf - robot.q) *
-            (10.0 * (time/timefreq)**3
-            - 15.0 * (time/timefreq)**4
-            + 6.0 * (time/timefreq)**5))
-
-        qdd.append(
-            frequency * (1.0/timefreq) * (qf - robot.q) *
-            (30.0 * (time/timefreq)**2.0
-            - 60.0 * (time/timefreq)**3.0
-            + 30.0 * (time/timefreq)**4.0))
+
+    # Evaluate the profile for every time step at once (rows are time steps)
+    s = np.arange(1, timefreq)[:, np.newaxis] / timefreq
+    delta = qf - robot.q
+
+    # Polynomials in Horner form, sharing s^2
+    s2 = s * s
+    qd = robot.q + delta * (s2 * s * (10.0 + s * (-15.0 + 6.0 * s)))
+    qdd = (frequency / timefreq) * delta * (s2 * (30.0 + s * (-60.0 + 30.0 * s)))
     
     return Trajectory('minimum-jerk', move_time, qd, qdd, None, True)
 
@@ -89,7 +95,7 @@ def populate_transform_stamped(parent_name: str, link_name: str, transform: np.a
     transform_stamped.transform.translation.y = transform[1,3]
     transform_stamped.transform.translation.z = transform[2,3]
 
-    rot = base.r2q(transform[:3,:3])
+    rot = mat_to_quat(transform)
     
     transform_stamped.transform.rotation.w = rot[0]
     transform_stamped.transform.rotation.x = rot[1]
@@ -97,3 +103,57 @@ def populate_transform_stamped(parent_name: str, link_name: str, transform: np.a
     transform_stamped.transform.rotation.z = rot[3]
 
     return transform_stamped
+
+def read_pose_table(config_path: str) -> Optional[Dict[str, List[float]]]:
+    """
+    Reads the named poses from the pose table (<config_path>.npz) written by
+    write_pose_table, provided it was written from exactly the current YAML
+    config (same mtime and size)
+
+    :param config_path: The path to the YAML config
+    :type config_path: str
+    :return: The joint configurations keyed by pose name, or None if the table
+        is missing, unreadable or stale (in which case the YAML should be read)
+    :rtype: Optional[Dict[str, List[float]]]
+    """
+    try:
+        source = os.stat(config_path)
+
+        with np.load(config_path + '.npz') as table:
+            if table['source'].tolist() == [source.st_mtime_ns, source.st_size]:
+                return dict(zip(table['names'].tolist(), table['q'].tolist()))
+
+    except (IOError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        pass
+
+    return None
+
+def write_pose_table(config_path: str, named_poses: Dict[str, List[float]]) -> None:
+    """
+    Writes the named poses alongside the YAML config at config_path as a table
+    of pose names and a (poses x joints) array, which loads without parsing
+    every joint value as YAML. The table records the mtime and size of the
+    YAML config, so must be written after it.
+
+    :param config_path: The path to the (already written) YAML config
+    :type config_path: str
+    :param named_poses: The joint configurations keyed by pose name
+    :type named_poses: Dict[str, List[float]]
+    """
+    table_name = config_path + '.npz'
+
+    try:
+        names = np.array(list(named_poses.keys()), dtype=str)
+        q = np.array(list(named_poses.values()), dtype=np.float64).reshape(len(names), -1)
+
+        source = os.stat(config_path)
+        source = np.array([source.st_mtime_ns, source.st_size], dtype=np.int64)
+
+        with open(table_name + '.tmp', 'wb') as handle:
+            np.savez(handle, names=names, q=q, source=source)
+        os.replace(table_name + '.tmp', table_name)
+
+    except ValueError:
+        # No poses, or poses of differing lengths, fall back to the YAML config alone
+        if os.path.exists(table_name):
+            os.remove(table_name)
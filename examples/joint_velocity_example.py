@@ -8,8 +8,8 @@ vel_pub = rospy.Publisher('/arm/joint/velocity', JointVelocity, queue_size=1)
 vel_msg = JointVelocity()
 vel_msg.joints = [0.0, -0.1, 0.0, 0.0, 0.0, 0.0]
 
-rate = rospy.Rate(100)
+# Armer decays joint velocity commands that are not refreshed within 0.1s,
+# so the constant setpoint is republished from a 100Hz timer
+rospy.Timer(rospy.Duration(0.01), lambda event: vel_pub.publish(vel_msg))
 
-while not rospy.is_shutdown():
-    vel_pub.publish(vel_msg)
-    rate.sleep()
\ No newline at end of file
+rospy.spin()
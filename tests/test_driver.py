@@ -8,6 +8,7 @@ import subprocess
 import signal
 import time
 import rospy
+import numpy as np
 
 from roboticstoolbox.backends.swift import Swift
 from roboticstoolbox.models.URDF.Panda import Panda
@@ -54,5 +55,21 @@ class TestDriver(unittest.TestCase):
         self.assertIsInstance(driver, Armer)
         driver.close()
 
+    def test_kinematics_cache(self):
+        """
+        Test the cached kinematics follow in place updates of the configuration
+        """
+        robot = ROSRobot(Panda())
+
+        pose, jacob0 = robot.kinematics()
+        robot.q[0] += 0.5
+        updated_pose, updated_jacob0 = robot.kinematics()
+
+        self.assertFalse(np.allclose(pose, updated_pose))
+        self.assertFalse(np.allclose(jacob0, updated_jacob0))
+        self.assertTrue(np.allclose(
+            updated_pose, robot.fkine(robot.q, start=robot.base_link, end=robot.gripper).A
+        ))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+.. codeauthor:: Gavin Suddrey
+"""
+
+import unittest
+import numpy as np
+
+from roboticstoolbox import ET, Robot
+from roboticstoolbox.models.URDF.Panda import Panda
+from spatialmath import SE3, SO3, UnitQuaternion
+
+from armer.kinematics import trace_chain, mat_to_quat, quat_to_transform, servo_error
+
+class TestKinematics(unittest.TestCase):
+    """
+    Test traced kinematics against the robotics toolbox
+    """
+    def assert_matches(self, ets, n):
+        """
+        Compares the traced chain with ETS evaluation at random configurations
+        """
+        fk_chain, jacob0_chain, fk_and_jacob0_chain = trace_chain(ets)
+
+        for _ in range(10):
+            q = np.random.uniform(-np.pi, np.pi, n)
+            self.assertTrue(np.allclose(fk_chain(q), ets.eval(q)))
+            self.assertTrue(np.allclose(jacob0_chain(q), ets.jacob0(q)))
+
+            pose, jacob0 = fk_and_jacob0_chain(q)
+            self.assertTrue(np.allclose(pose, ets.eval(q)))
+            self.assertTrue(np.allclose(jacob0, ets.jacob0(q)))
+
+    def test_panda(self):
+        """
+        Test tracing a URDF model from the base link to the hand
+        """
+        robot = Panda()
+        self.assert_matches(robot.ets(start=robot.base_link, end='panda_hand'), robot.n)
+
+    def test_flipped_and_prismatic(self):
+        """
+        Test tracing flipped and prismatic joints about every axis
+        """
+        ets = ET.tz(0.3) * ET.Rx(flip=True) * ET.ty(0.2) * ET.tx() \
+            * ET.Ry() * ET.tz(flip=True) * ET.Rz() * ET.tx(0.1)
+        robot = Robot(ets)
+        self.assert_matches(robot.ets(), robot.n)
+
+    def test_mat_to_quat(self):
+        """
+        Test rotation matrix to quaternion conversion across all branches
+        """
+        rotations = [SO3.Rx(np.pi), SO3.Ry(np.pi), SO3.Rz(np.pi)] + [SO3.Rand() for _ in range(20)]
+
+        for rotation in rotations:
+            expected = UnitQuaternion(rotation).A
+            actual = np.array(mat_to_quat(rotation.A))
+            self.assertTrue(np.allclose(actual, expected) or np.allclose(actual, -expected))
+
+    def test_quat_to_transform(self):
+        """
+        Test building a transform from a position and unnormalised quaternion
+        """
+        for _ in range(20):
+            position, quaternion = np.random.randn(3), 2 * np.random.randn(4)
+            expected = SE3(*position) * UnitQuaternion(quaternion).SE3()
+            self.assertTrue(np.allclose(quat_to_transform(*position, *quaternion), expected.A))
+
+    def test_servo_error(self):
+        """
+        Test the servo pose integration and error against spatialmath objects
+        """
+        # Random poses, plus errors at the pitch = +-pi/2 singularity of the rpy angles
+        poses = [(SE3.Rand(), SE3.Rand(), np.random.randn(6)) for _ in range(20)] + [
+            (SE3.Ry(np.pi / 2) * SE3.Rx(0.3), SE3(), np.zeros(6)),
+            (SE3.Ry(-np.pi / 2) * SE3.Rx(0.3), SE3(), np.zeros(6))
+        ]
+
+        for expected, actual, e_v in poses:
+            dt = 0.01
+
+            p = expected.t + e_v[:3] * dt
+            Rq = UnitQuaternion.RPY(e_v[3:] * dt) * UnitQuaternion(expected.R)
+            T = SE3.Rt(SO3(Rq.R), p, check=False)
+            e_rot = (SO3(T.R @ np.linalg.pinv(actual.R), check=False).rpy() + np.pi) % (2*np.pi) - np.pi
+
+            pose, error = servo_error(expected.A, actual.A, e_v, dt)
+            self.assertTrue(np.allclose(pose, T.A))
+            self.assertTrue(np.allclose(error, np.concatenate((p - actual.t, e_rot))))
+
+if __name__ == '__main__':
+    unittest.main()
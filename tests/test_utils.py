@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+.. codeauthor:: Gavin Suddrey
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from armer.utils import read_pose_table, write_pose_table
+
+class TestPoseTable(unittest.TestCase):
+    """
+    Test the named pose table written alongside the host config
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.directory, 'armer.yaml')
+        self.named_poses = {'home': [0.0, -0.3, 0.0, -2.2, 0.0, 2.0, 0.8], 'ready': [0.1] * 7}
+
+        with open(self.config_path, 'w') as handle:
+            handle.write('named_poses: {}\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        """
+        Test reading back the poses written from the current config
+        """
+        write_pose_table(self.config_path, self.named_poses)
+        self.assertEqual(read_pose_table(self.config_path), self.named_poses)
+
+    def test_stale_table(self):
+        """
+        Test a table is ignored once the config it was written from changes
+        """
+        write_pose_table(self.config_path, self.named_poses)
+
+        with open(self.config_path, 'a') as handle:
+            handle.write('# edited\n')
+
+        self.assertIsNone(read_pose_table(self.config_path))
+
+    def test_corrupt_table(self):
+        """
+        Test empty and truncated tables are ignored
+        """
+        write_pose_table(self.config_path, self.named_poses)
+
+        with open(self.config_path + '.npz', 'rb') as handle:
+            contents = handle.read()
+
+        for corrupted in (b'', contents[:len(contents) // 2]):
+            with open(self.config_path + '.npz', 'wb') as handle:
+                handle.write(corrupted)
+
+            self.assertIsNone(read_pose_table(self.config_path))
+
+    def test_untabulated_poses(self):
+        """
+        Test poses that cannot be tabulated remove any existing table
+        """
+        write_pose_table(self.config_path, self.named_poses)
+        write_pose_table(self.config_path, {'home': [0.0] * 7, 'short': [0.0] * 6})
+
+        self.assertFalse(os.path.exists(self.config_path + '.npz'))
+        self.assertIsNone(read_pose_table(self.config_path))
+
+if __name__ == '__main__':
+    unittest.main()